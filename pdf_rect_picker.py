@@ -1,10 +1,23 @@
+from __future__ import annotations
+
 import sys
-import json
+import threading
+from functools import partial
 from pathlib import Path
-
-import fitz  # PyMuPDF
-from PyQt6.QtCore import QPoint, QPointF, QRect, QRectF, Qt, pyqtSignal, QSize
-from PyQt6.QtGui import QGuiApplication, QImage, QKeySequence, QPainter, QPixmap, QShortcut
+from typing import TYPE_CHECKING
+
+from PyQt6.QtCore import QObject, QPoint, QRect, QRectF, QRunnable, Qt, QThreadPool, QTimer, pyqtSignal, QSize
+from PyQt6.QtGui import (
+    QGuiApplication,
+    QImage,
+    QKeySequence,
+    QPainter,
+    QPixmap,
+    QPixmapCache,
+    QRegion,
+    QShortcut,
+    QTransform,
+)
 from PyQt6.QtWidgets import (
     QApplication,
     QFileDialog,
@@ -21,6 +34,214 @@ from PyQt6.QtWidgets import (
     QPlainTextEdit,
 )
 
+import pdf_rect_picker_geom as geom
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; selection JSON falls back to an f-string template
+    orjson = None
+
+if TYPE_CHECKING:
+    import fitz  # PyMuPDF
+
+# Zooming past this multiple of the base render re-renders the page instead of upscaling.
+_RERENDER_THRESHOLD = 1.5
+_PIXMAP_CACHE_LIMIT_KB = 256 * 1024
+_ZOOM_DEBOUNCE_MS = 80
+# Renders smaller than this are cheap enough that scanning them is not worth it.
+_SCAN_MIN_PIXELS = 512 * 512
+_GRAYSCALE_THRESHOLD = 8
+
+
+def _get_fitz():
+    """Import PyMuPDF on first use; it is deferred to keep startup fast."""
+    global fitz
+    import fitz  # PyMuPDF
+
+    return fitz
+
+
+def _is_grayscale(buf, width, height, stride, n, threshold):
+    for y in range(height):
+        row = y * stride
+        for x in range(width):
+            i = row + x * n
+            r = int(buf[i])
+            g = int(buf[i + 1])
+            b = int(buf[i + 2])
+            if abs(r - g) + abs(r - b) >= threshold:
+                return False
+    return True
+
+
+def _is_opaque(buf, width, height, stride, n):
+    for y in range(height):
+        row = y * stride + n - 1
+        for x in range(width):
+            if buf[row + x * n] != 255:
+                return False
+    return True
+
+
+# (np, is_grayscale, is_opaque) once _load_scan_kernels() has run; scans are skipped until then
+# so loading numba never delays a render.
+_scan_kernels = None
+_scan_kernels_requested = False
+
+
+def _load_scan_kernels() -> None:
+    """Import numba and compile the scan kernels; runs as a low-priority pool task."""
+    global _scan_kernels
+    try:
+        import numpy as np
+        from numba import njit
+    except ImportError:  # numba is optional; grayscale and opacity detection are skipped
+        return
+    # Compiled (or loaded from numba's on-disk cache) eagerly here, not on the first scan.
+    # Serial on purpose: the kernels run on render worker threads, where numba's parallel
+    # workqueue layer is not safe to launch from.
+    is_grayscale = njit("b1(u1[::1], i8, i8, i8, i8, i8)", cache=True)(_is_grayscale)
+    is_opaque = njit("b1(u1[::1], i8, i8, i8, i8)", cache=True)(_is_opaque)
+    _scan_kernels = np, is_grayscale, is_opaque
+
+
+def start_loading_scan_kernels() -> None:
+    """Load the scan kernels in the background, once; queued page renders run first."""
+    global _scan_kernels_requested
+    if not _scan_kernels_requested:
+        _scan_kernels_requested = True
+        QThreadPool.globalInstance().start(_load_scan_kernels, -1)
+
+
+def detect_grayscale(samples: memoryview, width: int, height: int, stride: int, n: int) -> bool | None:
+    """Scan an RGB render for colour; None when it was not scanned and the answer is unknown."""
+    if n < 3 or width * height < _SCAN_MIN_PIXELS:
+        return None
+    kernels = _scan_kernels
+    if kernels is None:
+        return None
+    np, is_grayscale, _ = kernels
+    buf = np.frombuffer(samples, dtype=np.uint8)
+    return bool(is_grayscale(buf, width, height, stride, n, _GRAYSCALE_THRESHOLD))
+
+
+def detect_opaque(samples: memoryview, width: int, height: int, stride: int, n: int) -> bool:
+    if width * height < _SCAN_MIN_PIXELS:
+        return False
+    kernels = _scan_kernels
+    if kernels is None:
+        return False
+    np, _, is_opaque = kernels
+    buf = np.frombuffer(samples, dtype=np.uint8)
+    return bool(is_opaque(buf, width, height, stride, n))
+
+
+def pixmap_cache_key(doc: fitz.Document, page_number: int, scale: float, dpr: float, alpha: bool) -> str:
+    return f"{id(doc)}::{page_number}::{scale:.4f}::{dpr:.2f}::{int(alpha)}"
+
+
+# MuPDF must not be used from several threads at once. Every MuPDF call goes through this
+# lock: opening and freeing documents, loading pages, rendering, reading pixmap fields and
+# freeing pixmaps. Unlocked code only reads a pixmap's sample buffer.
+_render_lock = threading.Lock()
+
+
+def render_page_image(
+    doc: fitz.Document, page_index: int, scale: float, dpr: float, alpha: bool, grayscale: bool | None
+) -> tuple[QImage, fitz.Rect, bool | None]:
+    """Render a page off the GUI thread; returns the image, page rect and grayscale flag.
+
+    `grayscale` is None for pages that have not been scanned yet; only those renders are scanned.
+    """
+    # Render at device resolution so Qt blits the pixmap 1:1 on HiDPI screens.
+    matrix = fitz.Matrix(scale * dpr, scale * dpr)
+    # Pages already seen to be grayscale are re-rendered with one byte per pixel.
+    colorspace = fitz.csGRAY if grayscale and not alpha else fitz.csRGB
+    with _render_lock:
+        page = doc.load_page(page_index)
+        page_rect = page.rect
+        pix = page.get_pixmap(matrix=matrix, alpha=alpha, colorspace=colorspace)
+        del page
+        # Everything below only touches the sample buffer, not MuPDF itself.
+        samples = pix.samples_mv
+        width, height, stride, n, has_alpha = pix.width, pix.height, pix.stride, pix.n, bool(pix.alpha)
+    # The scans only read the sample buffer, so other workers can render meanwhile.
+    # An alpha render with every alpha at 0xFF is treated as opaque, so it skips the
+    # premultiplied path and blits through Qt's opaque fast path.
+    opaque = not has_alpha or detect_opaque(samples, width, height, stride, n)
+    if grayscale is None and not has_alpha:
+        grayscale = detect_grayscale(samples, width, height, stride, n)
+    if n == 1:
+        fmt = QImage.Format.Format_Grayscale8
+    elif has_alpha and opaque:
+        fmt = QImage.Format.Format_RGBX8888
+    elif has_alpha:
+        # MuPDF alpha pixmaps are premultiplied already.
+        fmt = QImage.Format.Format_RGBA8888_Premultiplied
+    else:
+        fmt = QImage.Format.Format_RGB888
+    # Wrap the MuPDF buffer without copying, then convert once into the format QPixmap
+    # uses natively; the converted image owns its pixels and outlives `pix`.
+    wrapped = QImage(samples, width, height, stride, fmt)
+    if opaque:
+        qimage = wrapped.convertToFormat(QImage.Format.Format_RGB32)
+    else:
+        qimage = wrapped.convertToFormat(QImage.Format.Format_ARGB32_Premultiplied)
+    qimage.setDevicePixelRatio(dpr)
+    with _render_lock:
+        # Dropping the last references frees the MuPDF pixmap, which goes through the shared context.
+        del wrapped, samples, pix
+    return qimage, page_rect, grayscale
+
+
+class RenderSignals(QObject):
+    finished = pyqtSignal(int, float, QImage, object, object)  # page index, scale, image, page rect, grayscale
+
+
+class RenderWorker(QRunnable):
+    """Renders one page on the thread pool and reports back through queued signals."""
+
+    def __init__(
+        self, doc: fitz.Document, page_index: int, scale: float, dpr: float, alpha: bool, grayscale: bool | None
+    ):
+        super().__init__()
+        # MainWindow owns the worker until its result is delivered; with auto-delete the pool
+        # would free the C++ object when run() returns and a later tryTake() would raise.
+        self.setAutoDelete(False)
+        self.signals = RenderSignals()
+        self.doc = doc
+        self.page_index = page_index
+        self.scale = scale
+        self.dpr = dpr
+        self.alpha = alpha
+        self.grayscale = grayscale
+        # Bookkeeping for MainWindow: which navigation step asked for this render and how
+        # to show it once it finishes.
+        self.doc_serial = 0
+        self.generation = 0
+        self.prefetch = False
+        self.keep_selection = True
+
+    def run(self):
+        image, page_rect, grayscale = render_page_image(
+            self.doc, self.page_index, self.scale, self.dpr, self.alpha, self.grayscale
+        )
+        with _render_lock:
+            # This may be the last reference to a document that was replaced meanwhile.
+            self.doc = None
+        self.signals.finished.emit(self.page_index, self.scale, image, page_rect, grayscale)
+
+
+def format_selection_json(page: int, rect: fitz.Rect) -> str:
+    if orjson is not None:
+        payload = {"page": page, "rect": [rect.x0, rect.y0, rect.x1, rect.y1]}
+        return orjson.dumps(payload, option=orjson.OPT_INDENT_2).decode()
+    # Same output as json.dumps({"page": ..., "rect": [...]}, indent=2) for this fixed shape.
+    return (
+        f'{{\n  "page": {page},\n  "rect": [\n'
+        f"    {rect.x0!r},\n    {rect.y0!r},\n    {rect.x1!r},\n    {rect.y1!r}\n  ]\n}}"
+    )
+
 
 class ScrollAreaWithSignal(QScrollArea):
     """Scroll area that notifies on viewport resize so the viewer can adjust."""
@@ -40,67 +261,116 @@ class PdfViewerWidget(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.pixmap: QPixmap | None = None
+        self._image_size = QSize()  # Pixmap size in logical (device-independent) pixels
         self.page_rect: fitz.Rect | None = None
+        self.page_index: int | None = None  # Index of the page the pixmap shows
         self.scale_factor: float = 1.0
+        self._base_pixmap: QPixmap | None = None
+        self._base_scale: float = 1.0
         self._pdf_selection: fitz.Rect | None = None
         self._rubber_band = QRubberBand(QRubberBand.Shape.Rectangle, self)
         self._dragging = False
+        self._selectable = True  # Off while the shown page is about to be replaced
         self._drag_start = QPoint()
+        self._drag_rect = QRect()  # Reused across mouse moves during a drag
         self._selection_widget_rect: QRectF | None = None
         self._viewport_size = QSize()
+        self._widget_to_pdf = QTransform()
+        self._pdf_to_widget = QTransform()
+        # paintEvent covers every dirty pixel itself, so skip Qt's background clear.
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent, True)
+        self.setAutoFillBackground(False)
         self.setMouseTracking(True)
 
     def set_viewport_size(self, size: QSize) -> None:
         self._viewport_size = size
         self._update_widget_size()
+        self._update_transforms()
         self._update_rubber_band_from_pdf()
 
     def clear_content(self) -> None:
-        self.pixmap = None
+        self._set_pixmap(None)
+        self._base_pixmap = None
         self.page_rect = None
+        self.page_index = None
         self._pdf_selection = None
         self._selection_widget_rect = None
         self._rubber_band.hide()
         self.update()
 
-    def set_page(self, page: fitz.Page, scale: float, keep_selection: bool = False) -> None:
-        self.page_rect = page.rect
+    def set_page(
+        self, page_index: int, page_rect: fitz.Rect, pixmap: QPixmap, scale: float, keep_selection: bool = False
+    ) -> None:
+        self.page_index = page_index
+        self.page_rect = page_rect
         self.scale_factor = scale
-        self.pixmap = self._render_page_pixmap(page, scale)
+        self._base_pixmap = pixmap
+        self._base_scale = scale
+        self._set_pixmap(self._base_pixmap)
         self._update_widget_size()
+        self._update_transforms()
         if not keep_selection:
             self._pdf_selection = None
         self._update_rubber_band_from_pdf()
         self.update()
 
+    def set_selectable(self, selectable: bool) -> None:
+        self._selectable = selectable
+        if not selectable and self._dragging:
+            self._dragging = False
+            self._update_rubber_band_from_pdf()
+
+    def set_scale(self, scale: float) -> bool:
+        """Rescale the base render; returns False when the page needs a fresh render."""
+        if not (self._base_pixmap and self.page_rect):
+            return False
+        if scale > self._base_scale * _RERENDER_THRESHOLD:
+            return False
+        self.scale_factor = scale
+        if scale == self._base_scale:
+            self._set_pixmap(self._base_pixmap)
+        else:
+            dpr = self._base_pixmap.devicePixelRatio()
+            pixmap = self._base_pixmap.scaled(
+                max(round(self.page_rect.width * scale * dpr), 1),
+                max(round(self.page_rect.height * scale * dpr), 1),
+                Qt.AspectRatioMode.IgnoreAspectRatio,
+                Qt.TransformationMode.SmoothTransformation,
+            )
+            pixmap.setDevicePixelRatio(dpr)
+            self._set_pixmap(pixmap)
+        self._update_widget_size()
+        self._update_transforms()
+        self._update_rubber_band_from_pdf()
+        self.update()
+        return True
+
+    def _set_pixmap(self, pixmap: QPixmap | None) -> None:
+        self.pixmap = pixmap
+        self._image_size = pixmap.deviceIndependentSize().toSize() if pixmap else QSize()
+
     def _update_widget_size(self) -> None:
         if not self.pixmap:
             return
-        target_width = max(self.pixmap.width(), self._viewport_size.width())
-        target_height = max(self.pixmap.height(), self._viewport_size.height())
+        target_width = max(self._image_size.width(), self._viewport_size.width())
+        target_height = max(self._image_size.height(), self._viewport_size.height())
+        # The scroll area is widget-resizable, so it resizes us to fit on its next layout pass.
         self.setMinimumSize(target_width, target_height)
-        self.resize(target_width, target_height)
+        self.updateGeometry()
 
-    def _render_page_pixmap(self, page: fitz.Page, scale: float) -> QPixmap:
-        matrix = fitz.Matrix(scale, scale)
-        pix = page.get_pixmap(matrix=matrix, alpha=True)
-        if pix.alpha:
-            fmt = QImage.Format.Format_RGBA8888
-        else:
-            fmt = QImage.Format.Format_RGB888
-        qimage = QImage(pix.samples, pix.width, pix.height, pix.stride, fmt)
-        qimage = qimage.copy()  # detach from Pixmap buffer
-        return QPixmap.fromImage(qimage)
+    def _update_transforms(self) -> None:
+        offset_x, offset_y = self.image_offsets()
+        scale = self.scale_factor
+        self._widget_to_pdf = QTransform().scale(1 / scale, 1 / scale).translate(-offset_x, -offset_y)
+        self._pdf_to_widget = QTransform().translate(offset_x, offset_y).scale(scale, scale)
 
     def image_offsets(self) -> tuple[float, float]:
         if not self.pixmap:
             return 0.0, 0.0
-        offset_x = max((self.width() - self.pixmap.width()) / 2, 0)
-        offset_y = max((self.height() - self.pixmap.height()) / 2, 0)
-        return offset_x, offset_y
+        return geom.image_offsets(self.width(), self.height(), self._image_size.width(), self._image_size.height())
 
     def mousePressEvent(self, event):
-        if event.button() == Qt.MouseButton.LeftButton and self.pixmap:
+        if event.button() == Qt.MouseButton.LeftButton and self.pixmap and self._selectable:
             self._dragging = True
             self._drag_start = event.position().toPoint()
             self._rubber_band.setGeometry(QRect(self._drag_start, QSize()))
@@ -109,30 +379,62 @@ class PdfViewerWidget(QWidget):
 
     def mouseMoveEvent(self, event):
         if self._dragging and self.pixmap:
-            rect = QRect(self._drag_start, event.position().toPoint()).normalized()
-            self._rubber_band.setGeometry(rect)
+            self._update_drag_rect(event.position().toPoint())
+            self._rubber_band.setGeometry(self._drag_rect)
         super().mouseMoveEvent(event)
 
     def mouseReleaseEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton and self._dragging and self.pixmap:
             self._dragging = False
-            rect = QRectF(QRect(self._drag_start, event.position().toPoint()).normalized())
+            self._update_drag_rect(event.position().toPoint())
+            rect = QRectF(self._drag_rect)
             self._selection_widget_rect = rect
             self._pdf_selection = self._widget_rect_to_pdf(rect)
-            self._update_rubber_band_from_pdf()
+            offset_x, offset_y = self.image_offsets()
+            image_rect = QRectF(offset_x, offset_y, self._image_size.width(), self._image_size.height())
+            if self._pdf_selection and image_rect.contains(rect):
+                # The drawn rect is already the selection; skip the PDF -> widget round-trip.
+                self._rubber_band.setGeometry(self._drag_rect)
+            else:
+                self._update_rubber_band_from_pdf()
             self.selection_changed.emit(self._pdf_selection)
         super().mouseReleaseEvent(event)
 
+    def _update_drag_rect(self, pos: QPoint) -> None:
+        x0, y0 = self._drag_start.x(), self._drag_start.y()
+        x1, y1 = pos.x(), pos.y()
+        self._drag_rect.setCoords(min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+
     def paintEvent(self, event):
         super().paintEvent(event)
+        dirty = event.rect()
+        background = self.palette().window()
+        painter = QPainter(self)
         if not self.pixmap:
+            painter.fillRect(dirty, background)
             return
-        painter = QPainter(self)
         offset_x, offset_y = self.image_offsets()
-        painter.drawPixmap(int(offset_x), int(offset_y), self.pixmap)
+        origin = QPoint(int(offset_x), int(offset_y))
+        target = QRect(origin, self._image_size)
+        if self.pixmap.hasAlphaChannel():
+            painter.fillRect(dirty, background)
+        elif not target.contains(dirty):
+            # Fill only the letterbox around the page.
+            painter.setClipRegion(QRegion(dirty).subtracted(QRegion(target)))
+            painter.fillRect(dirty, background)
+            painter.setClipping(False)
+        # Only blit the part of the pixmap inside the damaged rect; the source rect is in
+        # device pixels.
+        visible = dirty.intersected(target)
+        if not visible.isEmpty():
+            dpr = self.pixmap.devicePixelRatio()
+            source = QRectF(visible.translated(-origin))
+            source = QRectF(source.x() * dpr, source.y() * dpr, source.width() * dpr, source.height() * dpr)
+            painter.drawPixmap(QRectF(visible), self.pixmap, source)
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
+        self._update_transforms()
         self._update_rubber_band_from_pdf()
 
     def clear_selection(self) -> None:
@@ -159,32 +461,19 @@ class PdfViewerWidget(QWidget):
     def _widget_rect_to_pdf(self, rect: QRectF) -> fitz.Rect | None:
         if not self.page_rect:
             return None
-        offset_x, offset_y = self.image_offsets()
-        x0 = (rect.left() - offset_x) / self.scale_factor
-        y0 = (rect.top() - offset_y) / self.scale_factor
-        x1 = x0 + rect.width() / self.scale_factor
-        y1 = y0 + rect.height() / self.scale_factor
-
-        # Normalize and clamp to page bounds
-        norm = fitz.Rect(min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+        # mapRect returns a normalized rect; clamp it to page bounds
+        norm = self._widget_to_pdf.mapRect(rect)
         page_rect = self.page_rect
-        clamped = fitz.Rect(
-            max(page_rect.x0, norm.x0),
-            max(page_rect.y0, norm.y0),
-            min(page_rect.x1, norm.x1),
-            min(page_rect.y1, norm.y1),
+        clamped = geom.clamp_rect(
+            norm.left(), norm.top(), norm.right(), norm.bottom(),
+            page_rect.x0, page_rect.y0, page_rect.x1, page_rect.y1,
         )
-        if clamped.width == 0 or clamped.height == 0:
+        if clamped is None:
             return None
-        return clamped
+        return fitz.Rect(*clamped)
 
     def _pdf_rect_to_widget(self, rect: fitz.Rect) -> QRectF:
-        offset_x, offset_y = self.image_offsets()
-        x0 = rect.x0 * self.scale_factor + offset_x
-        y0 = rect.y0 * self.scale_factor + offset_y
-        x1 = rect.x1 * self.scale_factor + offset_x
-        y1 = rect.y1 * self.scale_factor + offset_y
-        return QRectF(QPointF(x0, y0), QPointF(x1, y1)).normalized()
+        return self._pdf_to_widget.mapRect(QRectF(rect.x0, rect.y0, rect.width, rect.height))
 
 
 class MainWindow(QMainWindow):
@@ -192,8 +481,19 @@ class MainWindow(QMainWindow):
         super().__init__()
         self.setWindowTitle("PDF Rect Picker")
         self.doc: fitz.Document | None = None
+        self.page_count = 0  # Cached at open so the GUI thread never reads the document unlocked
+        self._doc_serial = 0  # Bumped on every open; tells results for a previous document apart
         self.current_page_index = 0
         self.scale_factor = 1.0
+        self.render_alpha = False  # Per-document fallback for pages that need transparency
+        self._page_grayscale: dict[int, bool] = {}  # Scan results; each page is scanned once per document
+        self._page_rects: dict[int, fitz.Rect] = {}
+        self._render_workers: set[RenderWorker] = set()  # Keeps workers and their signals alive
+        self._render_generation = 0  # Bumped on every render request so outdated prefetches are ignored
+        QPixmapCache.setCacheLimit(_PIXMAP_CACHE_LIMIT_KB)
+        # Coalesces key-repeat zoom steps so only the final scale is applied.
+        self._zoom_timer = QTimer(self, singleShot=True, interval=_ZOOM_DEBOUNCE_MS)
+        self._zoom_timer.timeout.connect(self._apply_zoom)
 
         self.viewer = PdfViewerWidget()
         self.scroll_area = ScrollAreaWithSignal()
@@ -207,6 +507,9 @@ class MainWindow(QMainWindow):
         self.page_info_label = QLabel("Page: -")
         self.json_view = QPlainTextEdit()
         self.json_view.setReadOnly(True)
+        self._json_text = ""
+        self._json_stale = False  # Set when the selection changed while the JSON view was hidden
+        self._tracking_screen = False  # The native window only exists once shown
 
         self._build_ui()
         self._setup_shortcuts()
@@ -219,6 +522,9 @@ class MainWindow(QMainWindow):
         zoom_out_btn = QPushButton("Zoom Out")
         reset_zoom_btn = QPushButton("Reset Zoom")
         copy_btn = QPushButton("Copy Rect")
+        alpha_btn = QPushButton("Transparency")
+        alpha_btn.setCheckable(True)
+        alpha_btn.setToolTip("Render pages with an alpha channel instead of on a white background")
 
         open_btn.clicked.connect(self.open_pdf)
         prev_btn.clicked.connect(self.prev_page)
@@ -227,6 +533,7 @@ class MainWindow(QMainWindow):
         zoom_out_btn.clicked.connect(self.zoom_out)
         reset_zoom_btn.clicked.connect(self.reset_zoom)
         copy_btn.clicked.connect(self.copy_rect)
+        alpha_btn.toggled.connect(self.set_render_alpha)
 
         self.buttons = {
             "open": open_btn,
@@ -236,6 +543,7 @@ class MainWindow(QMainWindow):
             "zoom_out": zoom_out_btn,
             "reset_zoom": reset_zoom_btn,
             "copy": copy_btn,
+            "alpha": alpha_btn,
         }
 
         controls = QHBoxLayout()
@@ -246,6 +554,7 @@ class MainWindow(QMainWindow):
         controls.addWidget(zoom_out_btn)
         controls.addWidget(reset_zoom_btn)
         controls.addWidget(copy_btn)
+        controls.addWidget(alpha_btn)
         controls.addStretch()
         controls.addWidget(self.page_label)
 
@@ -286,56 +595,202 @@ class MainWindow(QMainWindow):
         if not path:
             return
         try:
-            doc = fitz.open(path)
+            with _render_lock:
+                doc = _get_fitz().open(path)
+                page_count = doc.page_count
         except Exception as exc:  # noqa: BLE001
             QMessageBox.critical(self, "Error", f"Failed to open PDF:\n{exc}")
             return
-        self.doc = doc
+        self._cancel_pending_renders()
+        with _render_lock:
+            # Replacing the reference may free the previous document.
+            self.doc = doc
+        self.page_count = page_count
+        self._doc_serial += 1
+        # Keys are built from id(doc), which a new document may reuse.
+        QPixmapCache.clear()
+        self.render_alpha = False
+        self.buttons["alpha"].setChecked(False)
+        self._page_grayscale.clear()
+        self._page_rects.clear()
         self.current_page_index = 0
         self.scale_factor = 1.0
-        self.load_page(keep_selection=False)
+        self._show_current_page()
+        start_loading_scan_kernels()
         self.setWindowTitle(f"PDF Rect Picker - {Path(path).name}")
         self._update_controls()
 
-    def load_page(self, keep_selection: bool) -> None:
+    def _show_current_page(self) -> None:
+        self.clear_selection()
+        self._render_current(keep_selection=False)
+        self._refresh_info()
+
+    def _refresh_info(self) -> None:
         if not self.doc:
             return
-        page = self.doc.load_page(self.current_page_index)
-        self.viewer.set_page(page, self.scale_factor, keep_selection=keep_selection)
-        self.page_label.setText(f"Page: {self.current_page_index + 1} / {self.doc.page_count}")
-        self.page_info_label.setText(f"Page: {self.current_page_index + 1} / {self.doc.page_count}")
-        if not keep_selection:
+        self.page_label.setText(f"Page: {self.current_page_index + 1} / {self.page_count}")
+        self.page_info_label.setText(f"Page: {self.current_page_index + 1} / {self.page_count}")
+
+    def _render_current(self, keep_selection: bool) -> None:
+        if not self.doc:
+            return
+        # A selection belongs to the page the viewer shows; it never carries over to another page,
+        # even when a zoom re-requests a page change that is still rendering.
+        keep_selection = keep_selection and self.viewer.page_index == self.current_page_index
+        self._render_generation += 1
+        self._cancel_pending_renders()
+        pixmap = self._cached_pixmap(self.current_page_index)
+        if pixmap is not None:
+            page_rect = self._page_rects[self.current_page_index]
+            self.viewer.set_page(
+                self.current_page_index, page_rect, pixmap, self.scale_factor, keep_selection=keep_selection
+            )
+        else:
+            # Render in the background; the viewer keeps showing the previous pixmap meanwhile.
+            self._request_render(self.current_page_index, prefetch=False, keep_selection=keep_selection)
+        self._update_selectable()
+        self._prefetch_neighbours()
+
+    def _prefetch_neighbours(self) -> None:
+        for page_index in (self.current_page_index + 1, self.current_page_index - 1):
+            if 0 <= page_index < self.page_count and self._cached_pixmap(page_index) is None:
+                self._request_render(page_index, prefetch=True)
+
+    def _cached_pixmap(self, page_index: int) -> QPixmap | None:
+        if page_index not in self._page_rects:
+            return None
+        key = pixmap_cache_key(
+            self.doc, page_index, self.scale_factor, self.viewer.devicePixelRatioF(), self.render_alpha
+        )
+        return QPixmapCache.find(key)
+
+    def _cancel_pending_renders(self) -> None:
+        pool = QThreadPool.globalInstance()
+        for worker in list(self._render_workers):
+            if pool.tryTake(worker):
+                self._render_workers.discard(worker)
+                worker.doc = None  # Safe unlocked: self.doc still references the document
+
+    def _request_render(self, page_index: int, prefetch: bool, keep_selection: bool = True) -> None:
+        dpr = self.viewer.devicePixelRatioF()
+        for worker in self._render_workers:
+            if (
+                worker.doc_serial == self._doc_serial
+                and worker.page_index == page_index
+                and worker.scale == self.scale_factor
+                and worker.dpr == dpr
+                and worker.alpha == self.render_alpha
+            ):
+                # Already rendering; adopt it for this generation instead of starting another.
+                worker.generation = self._render_generation
+                if not prefetch:
+                    worker.prefetch = False
+                    worker.keep_selection = keep_selection
+                return
+        worker = RenderWorker(
+            self.doc,
+            page_index,
+            self.scale_factor,
+            dpr,
+            self.render_alpha,
+            self._page_grayscale.get(page_index),
+        )
+        worker.doc_serial = self._doc_serial
+        worker.generation = self._render_generation
+        worker.prefetch = prefetch
+        worker.keep_selection = keep_selection
+        worker.signals.finished.connect(partial(self._on_render_finished, worker))
+        self._render_workers.add(worker)
+        QThreadPool.globalInstance().start(worker)
+
+    def _on_render_finished(
+        self,
+        worker: RenderWorker,
+        page_index: int,
+        scale: float,
+        image: QImage,
+        page_rect: fitz.Rect,
+        grayscale: bool | None,
+    ) -> None:
+        self._render_workers.discard(worker)
+        if worker.doc_serial != self._doc_serial:
+            return
+        self._page_rects[page_index] = page_rect
+        if grayscale is not None:
+            self._page_grayscale[page_index] = grayscale
+        pixmap = QPixmap.fromImage(image)
+        QPixmapCache.insert(pixmap_cache_key(self.doc, page_index, scale, worker.dpr, worker.alpha), pixmap)
+        if worker.prefetch and worker.generation != self._render_generation:
+            return  # Outdated prefetch: keep the finished render in the cache, but don't show it
+        if page_index != self.current_page_index or scale != self.scale_factor or worker.alpha != self.render_alpha:
+            return  # Stale: the user moved on while this page was rendering
+        self.viewer.set_page(page_index, page_rect, pixmap, scale, keep_selection=worker.keep_selection)
+        self._update_selectable()
+        if not worker.keep_selection:
             self.clear_selection()
 
+    def _update_selectable(self) -> None:
+        # Don't let a rect be drawn on the previous page's pixels while the current one renders.
+        self.viewer.set_selectable(self.viewer.page_index == self.current_page_index)
+
     def next_page(self) -> None:
-        if self.doc and self.current_page_index < self.doc.page_count - 1:
+        if self.doc and self.current_page_index < self.page_count - 1:
             self.current_page_index += 1
-            self.load_page(keep_selection=False)
+            self._show_current_page()
             self._update_controls()
 
     def prev_page(self) -> None:
         if self.doc and self.current_page_index > 0:
             self.current_page_index -= 1
-            self.load_page(keep_selection=False)
+            self._show_current_page()
             self._update_controls()
 
     def zoom_in(self) -> None:
         if not self.doc:
             return
         self.scale_factor = min(self.scale_factor * 1.25, 6.0)
-        self.load_page(keep_selection=True)
+        self._zoom_timer.start()
 
     def zoom_out(self) -> None:
         if not self.doc:
             return
         self.scale_factor = max(self.scale_factor / 1.25, 0.2)
-        self.load_page(keep_selection=True)
+        self._zoom_timer.start()
 
     def reset_zoom(self) -> None:
         if not self.doc:
             return
         self.scale_factor = 1.0
-        self.load_page(keep_selection=True)
+        self._zoom_timer.start()
+
+    def _apply_zoom(self) -> None:
+        # Rescaling only works on what the viewer shows. If that is another page, or a render for
+        # the current page is still in flight at the old scale (and would be dropped as stale),
+        # request a render at the new scale instead.
+        if (
+            self.viewer.page_index != self.current_page_index
+            or self._display_render_pending()
+            or not self.viewer.set_scale(self.scale_factor)
+        ):
+            self._render_current(keep_selection=True)
+        else:
+            # Nothing is cached at the new scale yet; render the neighbours at it so paging on
+            # stays on the cache path.
+            self._render_generation += 1
+            self._cancel_pending_renders()
+            self._prefetch_neighbours()
+
+    def _display_render_pending(self) -> bool:
+        return any(
+            not worker.prefetch and worker.page_index == self.current_page_index for worker in self._render_workers
+        )
+
+    def set_render_alpha(self, enabled: bool) -> None:
+        if enabled == self.render_alpha:
+            return
+        self.render_alpha = enabled
+        # The cache key includes the alpha flag, so both variants can stay cached side by side.
+        self._render_current(keep_selection=True)
 
     def clear_selection(self) -> None:
         self.viewer.clear_selection()
@@ -351,24 +806,47 @@ class MainWindow(QMainWindow):
         if rect:
             rect_text = f"Rect: ({rect.x0:.2f}, {rect.y0:.2f}, {rect.x1:.2f}, {rect.y1:.2f})"
             size_text = f"Size: {rect.width:.2f} x {rect.height:.2f}"
-            json_text = json.dumps({"page": self.current_page_index + 1, "rect": [rect.x0, rect.y0, rect.x1, rect.y1]}, indent=2)
         else:
             rect_text = "Rect: -"
             size_text = "Size: -"
-            json_text = ""
         self.rect_label.setText(rect_text)
         self.size_label.setText(size_text)
-        self.json_view.setPlainText(json_text)
+        self._refresh_json()
         self._update_controls()
 
+    def _refresh_json(self) -> None:
+        if not self.json_view.isVisible():
+            self._json_stale = True
+            return
+        self._json_stale = False
+        rect = self.viewer.current_pdf_rect()
+        json_text = format_selection_json(self.viewer.page_index + 1, rect) if rect else ""
+        if json_text != self._json_text:
+            self._json_text = json_text
+            self.json_view.setPlainText(json_text)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self._tracking_screen and self.windowHandle() is not None:
+            self.windowHandle().screenChanged.connect(self._on_screen_changed)
+            self._tracking_screen = True
+        if self._json_stale:
+            self._refresh_json()
+
+    def _on_screen_changed(self, screen) -> None:
+        # The device pixel ratio is part of the cache key, so pages are re-rendered for the new
+        # screen (or picked up from the cache when its ratio matches).
+        self._render_current(keep_selection=True)
+
     def _update_controls(self) -> None:
         has_doc = self.doc is not None
         has_rect = self.viewer.current_pdf_rect() is not None
         self.buttons["prev"].setEnabled(has_doc and self.current_page_index > 0)
-        self.buttons["next"].setEnabled(has_doc and self.doc and self.current_page_index < self.doc.page_count - 1)
+        self.buttons["next"].setEnabled(has_doc and self.current_page_index < self.page_count - 1)
         self.buttons["zoom_in"].setEnabled(has_doc)
         self.buttons["zoom_out"].setEnabled(has_doc)
         self.buttons["reset_zoom"].setEnabled(has_doc)
+        self.buttons["alpha"].setEnabled(has_doc)
         self.buttons["copy"].setEnabled(has_rect)
 
 
@@ -0,0 +1,24 @@
+"""Plain-float geometry helpers used by the viewer.
+
+Kept free of Qt and PyMuPDF types so the module can be compiled with mypyc
+(`mypyc pdf_rect_picker_geom.py`); the pure-Python version is used otherwise.
+"""
+
+
+def image_offsets(widget_width: int, widget_height: int, image_width: int, image_height: int) -> tuple[float, float]:
+    offset_x = max((widget_width - image_width) / 2, 0.0)
+    offset_y = max((widget_height - image_height) / 2, 0.0)
+    return offset_x, offset_y
+
+
+def clamp_rect(
+    x0: float, y0: float, x1: float, y1: float, bx0: float, by0: float, bx1: float, by1: float
+) -> tuple[float, float, float, float] | None:
+    """Clamp a normalized rect to the bounds rect; returns None if nothing is left."""
+    cx0 = max(bx0, x0)
+    cy0 = max(by0, y0)
+    cx1 = min(bx1, x1)
+    cy1 = min(by1, y1)
+    if cx1 <= cx0 or cy1 <= cy0:
+        return None
+    return cx0, cy0, cx1, cy1